@@ -3,7 +3,7 @@ from pathlib import Path
 
 # SQLAlchemy
 import sqlalchemy as sa
-from sqlalchemy import create_engine, inspect, UniqueConstraint
+from sqlalchemy import create_engine, inspect, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
@@ -84,6 +84,11 @@ class Answer(Base):
 
     answer_time = sa.Column(sa.String, nullable=False)
 
+    # index the "has this user already answered this quiz correctly" lookup
+    __table_args__ = (
+        Index("ix_answer_user_quiz_correct", "user_id", "quiz_id", "is_correct"),
+    )
+
 
 class UserStartQuizTimestamp(Base):
     __tablename__ = "user_start_quiz_timestamp"
@@ -96,8 +101,8 @@ class UserStartQuizTimestamp(Base):
     quiz_id = sa.Column(sa.Integer, sa.ForeignKey(Quiz.id), nullable=False)
     quiz = relationship(Quiz, backref="start_quiz_timestamps")
 
-    # answer time in seconds
-    timestamp = sa.Column(sa.DateTime, nullable=False)
+    # epoch seconds at which the user started the quiz
+    timestamp = sa.Column(sa.Float, nullable=False)
 
     # ensure there's only one start quiz timestamp per user per quiz
     __table_args__ = (UniqueConstraint("user_id", "quiz_id", name="uq_userid_quizid"),)
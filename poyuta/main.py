@@ -1,6 +1,8 @@
 # Standard libraries
 import re
+import time
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Optional
 
 # Discord
@@ -9,6 +11,15 @@ from discord import app_commands, Embed, Button, ButtonStyle
 from discord.ext import commands
 import random
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import case, func
+
+# re2 guarantees linear time matching on the generated answer patterns
+# (they only use alternations and character classes, which it accepts verbatim)
+# fall back to the standard library backtracking engine if it isn't installed
+try:
+    import re2
+except ImportError:
+    re2 = None
 
 # Database
 from poyuta.database import (
@@ -24,9 +35,11 @@ from poyuta.database import (
 # Utils
 from poyuta.utils import (
     load_environment,
+    can_possibly_match,
     process_user_input,
     get_current_quiz_date,
     get_user_from_id,
+    get_quiz_types,
     get_quiz_type_choices,
     is_admin,
     generate_stats_embed_content,
@@ -59,6 +72,19 @@ class PoyutaBot(commands.Bot):
 # Instantiate bot
 bot = PoyutaBot(command_prefix=config["COMMAND_PREFIX"], intents=intents)
 
+# build the quiz type choices once for the slash command decorators
+# instead of opening a session per decorated command
+with bot.session as session:
+    _QUIZ_TYPE_CHOICES = get_quiz_type_choices(session=session)
+
+
+@lru_cache(maxsize=2048)
+def _compile_answer_regex(pattern: str):
+    """Compile an answer pattern once and reuse it for repeated guesses."""
+    if re2 is not None:
+        return re2.compile(pattern)
+    return re.compile(pattern)
+
 
 @bot.event
 async def on_ready():
@@ -87,7 +113,7 @@ async def postquizresults(ctx):
 
 
 @bot.tree.command(name="newquiz")
-@app_commands.choices(quiz_type=get_quiz_type_choices(session=bot.session))
+@app_commands.choices(quiz_type=_QUIZ_TYPE_CHOICES)
 @app_commands.describe(
     quiz_type="type of the quiz to update",
     new_clip="input new clip for female",
@@ -108,11 +134,11 @@ async def new_quiz(
             )
             return
 
-        latest_quiz = (
-            session.query(Quiz)
+        # only the latest date is needed, no need to hydrate a whole quiz row
+        latest_quiz_date = (
+            session.query(func.max(Quiz.date))
             .filter(Quiz.id_type == quiz_type.value)
-            .order_by(Quiz.date.desc())
-            .first()
+            .scalar()
         )
 
         # get current date
@@ -123,8 +149,8 @@ async def new_quiz(
         # if the latest quiz date is in the future
         # that means there's already a quiz for today, so add the new date to the planned quizzes
         # i.e latest quiz date + 1 day
-        if latest_quiz and latest_quiz.date >= current_quiz_date:
-            new_date = latest_quiz.date + timedelta(days=1)
+        if latest_quiz_date and latest_quiz_date >= current_quiz_date:
+            new_date = latest_quiz_date + timedelta(days=1)
         # else there aren't any quiz today, so the new date is today
         else:
             new_date = current_quiz_date
@@ -146,7 +172,7 @@ async def new_quiz(
 
 
 @bot.tree.command(name="updatequiz")
-@app_commands.choices(quiz_type=get_quiz_type_choices(session=bot.session))
+@app_commands.choices(quiz_type=_QUIZ_TYPE_CHOICES)
 @app_commands.describe(
     quiz_date="date of the quiz to update in YYYY-MM-DD format",
     quiz_type="type of the quiz to update",
@@ -241,7 +267,23 @@ async def planned_quizzes(interaction: discord.Interaction):
         embed = discord.Embed(title="Planned Quizzes")
 
         # get all the quiz types
-        quiz_types = session.query(QuizType).all()
+        quiz_types = get_quiz_types(session=session)
+
+        # get all the planned quizzes in a single query
+        # and index them by date and type to avoid one query per pair
+        quizzes_by_date_type = {
+            (quiz.date, quiz.id_type): quiz
+            for quiz in session.query(Quiz).filter(Quiz.date >= current_quiz_date)
+        }
+
+        # precompute the linebreak positions once instead of re-checking them
+        # per type and date : every two types unless last type
+        # with the default two quiz types there are none
+        linebreak_indices = frozenset(
+            j
+            for j in range(len(quiz_types))
+            if j % 2 == 0 and j != 0 and j != len(quiz_types) - 1
+        )
 
         for i, quiz_date in enumerate(unique_date):
             quiz_date = quiz_date[0]
@@ -252,13 +294,9 @@ async def planned_quizzes(interaction: discord.Interaction):
                 inline=False,
             )
 
-            for i, quiz_type in enumerate(quiz_types):
+            for j, quiz_type in enumerate(quiz_types):
                 # get quiz for this type and date
-                quiz = (
-                    session.query(Quiz)
-                    .filter(Quiz.id_type == quiz_type.id, Quiz.date == quiz_date)
-                    .first()
-                )
+                quiz = quizzes_by_date_type.get((quiz_date, quiz_type.id))
                 value = (
                     f"[{quiz.answer}]({quiz.clip})"
                     if quiz
@@ -271,7 +309,7 @@ async def planned_quizzes(interaction: discord.Interaction):
                 )
 
                 # Linebreak every two types unless last type
-                if i % 2 == 0 and i != 0 and i != len(quiz_types) - 1:
+                if j in linebreak_indices:
                     embed.add_field(name="", value="", inline=False)
 
             # Linebreak unless last date
@@ -285,13 +323,13 @@ async def planned_quizzes(interaction: discord.Interaction):
 @app_commands.describe(
     quiz_type="type of the quiz to answer", answer="your answer for this quiz"
 )
-@app_commands.choices(quiz_type=get_quiz_type_choices(session=bot.session))
+@app_commands.choices(quiz_type=_QUIZ_TYPE_CHOICES)
 async def anwswer_quiz(
     interaction: discord.Interaction, quiz_type: app_commands.Choice[int], answer: str
 ):
     """guess the seiyuu for the current quiz_type quiz."""
 
-    answer_time = datetime.now()
+    answer_time = time.time()
 
     with bot.session as session:
         current_quiz_date = get_current_quiz_date(
@@ -308,6 +346,7 @@ async def anwswer_quiz(
             await interaction.response.send_message(
                 f"No {quiz_type.name} quiz today :disappointed_relieved:"
             )
+            return
 
         user = get_user_from_id(
             session=session,
@@ -318,12 +357,20 @@ async def anwswer_quiz(
 
         # if the user has already answered the quiz correctly
         # don't let them answer again
-        for answer in user.answers:
-            if answer.quiz_id == quiz.id and answer.is_correct:
-                await interaction.response.send_message(
-                    f"You have already answered correctly for today's {quiz_type.name} quiz."
-                )
-                return
+        already_correct = (
+            session.query(Answer.id)
+            .filter(
+                Answer.user_id == user.id,
+                Answer.quiz_id == quiz.id,
+                Answer.is_correct.is_(True),
+            )
+            .first()
+        )
+        if already_correct:
+            await interaction.response.send_message(
+                f"You have already answered correctly for today's {quiz_type.name} quiz."
+            )
+            return
 
         # get the time at which the user clicked the button
         start_quiz_timestamp = (
@@ -345,42 +392,37 @@ async def anwswer_quiz(
 
         # compute answer time in seconds
         answer_time = answer_time - start_quiz_timestamp.timestamp
-        answer_time = answer_time.total_seconds()
-
-    # create the answer object
-    user_answer = Answer(
-        user_id=user.id,
-        quiz_id=quiz.id,
-        answer=answer,
-        answer_time=answer_time,
-    )
 
-    # Generate a pattern to match with the correct answer
-    user_answer_pattern = process_user_input(
-        user_answer.answer, partial_match=False, swap_words=True
-    )
+        # cheap pre-check : skip the regex entirely when the guess contains
+        # a character that can't possibly match the correct answer
+        if not can_possibly_match(answer, quiz.answer):
+            is_correct = False
+        else:
+            # Generate a pattern to match with the correct answer
+            # lowercase before the call so differently cased guesses of the
+            # same name share a pattern cache entry
+            user_answer_pattern = process_user_input(
+                answer.lower(), partial_match=False, swap_words=True
+            )
 
-    # If the pattern matches : the answer is correct
-    if re.search(user_answer_pattern, quiz.answer):
-        # Send feedback to the user
-        await interaction.response.send_message("✅")
+            # If the pattern matches the whole answer : the answer is correct
+            is_correct = bool(
+                _compile_answer_regex(user_answer_pattern).fullmatch(quiz.answer)
+            )
 
         # Store the user's answer in the Answer table
-        with bot.session as session:
-            user_answer.is_correct = True
-            session.add(user_answer)
-            session.commit()
-
-    # Otherwise, the pattern doesn't match : the answer is incorrect
-    else:
-        # Send feedback to the user
-        await interaction.response.send_message("❌")
+        user_answer = Answer(
+            user_id=user.id,
+            quiz_id=quiz.id,
+            answer=answer,
+            answer_time=answer_time,
+            is_correct=is_correct,
+        )
+        session.add(user_answer)
+        session.commit()
 
-        # Store the user's answer in the Answer table
-        with bot.session as session:
-            user_answer.is_correct = False
-            session.add(user_answer)
-            session.commit()
+    # Send feedback to the user
+    await interaction.response.send_message("✅" if is_correct else "❌")
 
 
 @bot.tree.command(name="mystats")
@@ -405,22 +447,41 @@ async def my_stats(interaction: discord.Interaction):
         avatar_url = interaction.user.avatar.url
         embed.set_author(name=interaction.user.name, icon_url=avatar_url)
 
-        quiz_types = session.query(QuizType).all()
+        # aggregate the stats per quiz type in a single grouped query
+        # instead of shipping the whole answer history to Python
+        stats_by_type = {
+            id_type: (nb_attempts, nb_unique_quizzes, nb_correct_answers)
+            for id_type, nb_attempts, nb_unique_quizzes, nb_correct_answers in (
+                session.query(
+                    Quiz.id_type,
+                    func.count(Answer.id),
+                    func.count(func.distinct(Answer.quiz_id)),
+                    func.sum(case((Answer.is_correct, 1), else_=0)),
+                )
+                .select_from(Answer)
+                .join(Quiz, Answer.quiz_id == Quiz.id)
+                .filter(Answer.user_id == user.id)
+                .group_by(Quiz.id_type)
+            )
+        }
+
+        quiz_types = get_quiz_types(session=session)
         for quiz_type in quiz_types:
-            # get the answers for this user and this quiz type
+            # get the stats for this user and this quiz type
             embed.add_field(
                 name=f"{quiz_type.emoji} {quiz_type.type}", value="", inline=False
             )
 
+            nb_attempts, nb_unique_quizzes, nb_correct_answers = stats_by_type.get(
+                quiz_type.id, (0, 0, 0)
+            )
+
             # generate the embed content for this quiz_type
             embed = generate_stats_embed_content(
-                session=session,
                 embed=embed,
-                answers=[
-                    answer
-                    for answer in user.answers
-                    if answer.quiz.id_type == quiz_type.id
-                ],
+                nb_attempts=nb_attempts,
+                nb_unique_quizzes=nb_unique_quizzes,
+                nb_correct_answers=nb_correct_answers,
             )
 
             # Linebreak unless last quiz type
@@ -456,14 +517,17 @@ async def post_yesterdays_quiz_results():
 
     # Query the database for the quiz that matches the calculated date
     with bot.session as session:
-        quiz_types = session.query(QuizType).all()
+        quiz_types = get_quiz_types(session=session)
+
+        # get all of yesterday's quizzes in a single query, indexed by type
+        quizzes_by_type = {
+            quiz.id_type: quiz
+            for quiz in session.query(Quiz).filter(Quiz.date == yesterday)
+        }
+
         for i, quiz_type in enumerate(quiz_types):
-            # get yesterday's male quiz
-            yesterday_quiz = (
-                session.query(Quiz)
-                .filter(Quiz.id_type == quiz_type.id, Quiz.date == yesterday)
-                .first()
-            )
+            # get yesterday's quiz for this type
+            yesterday_quiz = quizzes_by_type.get(quiz_type.id)
 
             embed.add_field(
                 name=f"> {quiz_type.emoji} {quiz_type.type}",
@@ -497,8 +561,8 @@ async def post_yesterdays_quiz_results():
             if quiz_type != quiz_types[-1]:
                 embed.add_field(name="\u200b", value="", inline=False)
 
-        # Create a single View
-        view = NewQuizView()
+        # Create a single View for today's quizzes
+        view = NewQuizView(new_quiz_date=current_quiz_date)
 
         # Send the message with the view
         await channel.send(embed=embed, view=view)
@@ -509,13 +573,7 @@ class NewQuizButton(discord.ui.Button):
     Class for the NewQuizButton
     """
 
-    def __init__(
-        self,
-        quiz_type: QuizType,
-        new_quiz_date: date = get_current_quiz_date(
-            daily_quiz_reset_time=DAILY_QUIZ_RESET_TIME
-        ),
-    ):
+    def __init__(self, quiz_type: QuizType, new_quiz_date: date):
         super().__init__(
             label=f"Play today's {quiz_type.type} Quiz",
             style=discord.ButtonStyle.green,
@@ -552,14 +610,20 @@ class NewQuizButton(discord.ui.Button):
 
             # if they already clicked it before
             # don't let them click it again
-            if user.id not in [
-                start_time.user_id for start_time in current_quiz.start_quiz_timestamps
-            ]:
+            already_started = (
+                session.query(UserStartQuizTimestamp.id)
+                .filter(
+                    UserStartQuizTimestamp.user_id == user.id,
+                    UserStartQuizTimestamp.quiz_id == current_quiz.id,
+                )
+                .first()
+            )
+            if not already_started:
                 # Add the timestamp at which they clicked the button in db
                 new_start_quiz_timestamp = UserStartQuizTimestamp(
                     user_id=user.id,
                     quiz_id=current_quiz.id,
-                    timestamp=datetime.now(),
+                    timestamp=time.time(),
                 )
                 session.add(new_start_quiz_timestamp)
                 session.commit()
@@ -570,10 +634,10 @@ class NewQuizButton(discord.ui.Button):
 
 
 class NewQuizView(discord.ui.View):
-    def __init__(self):
+    def __init__(self, new_quiz_date: date):
         super().__init__()
 
         with bot.session as session:
-            for quiz_type in session.query(QuizType).all():
-                button = NewQuizButton(quiz_type=quiz_type)
+            for quiz_type in get_quiz_types(session=session):
+                button = NewQuizButton(quiz_type=quiz_type, new_quiz_date=new_quiz_date)
                 self.add_item(button)
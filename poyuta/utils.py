@@ -6,6 +6,8 @@ Utility functions for the bot.
 import os
 import re
 from datetime import datetime, date, time, timedelta
+from functools import cache, lru_cache
+from time import monotonic
 
 # Discord.py
 from discord import app_commands, Embed
@@ -14,52 +16,88 @@ from discord import app_commands, Embed
 from dotenv import dotenv_values
 
 # Database models
-from poyuta.database import Quiz, QuizType, Answer, User
+from poyuta.database import QuizType, User
 
 # Typing helpers
 from sqlalchemy.orm.session import Session
 
-# Define a list of replacement rules
-ANIME_REGEX_REPLACE_RULES = [
+# Define the (input, replace) replacement rules
+ANIME_REGEX_REPLACE_RULES = (
     # Ļ can't lower correctly with sql lower function
-    {"input": "ļ", "replace": "[ļĻ]"},
-    {"input": "l", "replace": "[l˥ļĻΛ]"},
+    ("ļ", "[ļĻ]"),
+    ("l", "[l˥ļĻΛ]"),
     # Ź can't lower correctly with sql lower function
-    {"input": "ź", "replace": "[źŹ]"},
-    {"input": "z", "replace": "[zźŹ]"},
-    {"input": "ou", "replace": "(ou|ō|o)"},
-    {"input": "oo", "replace": "(oo|ō|o)"},
-    {"input": "oh", "replace": "(oh|ō|o)"},
-    {"input": "wo", "replace": "(wo|o)"},
-    {"input": "o", "replace": "([oōóòöôøӨΦο]|ou|oo|oh|wo)"},
-    {"input": "uu", "replace": "(uu|u|ū)"},
-    {"input": "u", "replace": "([uūûúùüǖμ]|uu)"},
-    {"input": "aa", "replace": "(aa|a)"},
-    {"input": "ae", "replace": "(ae|æ)"},
-    {"input": "a", "replace": "([aäãά@âàáạåæā∀Λ]|aa)"},
-    {"input": "c", "replace": "[cςč℃Ↄ]"},
+    ("ź", "[źŹ]"),
+    ("z", "[zźŹ]"),
+    ("ou", "(ou|ō|o)"),
+    ("oo", "(oo|ō|o)"),
+    ("oh", "(oh|ō|o)"),
+    ("wo", "(wo|o)"),
+    ("o", "([oōóòöôøӨΦο]|ou|oo|oh|wo)"),
+    ("uu", "(uu|u|ū)"),
+    ("u", "([uūûúùüǖμ]|uu)"),
+    ("aa", "(aa|a)"),
+    ("ae", "(ae|æ)"),
+    ("a", "([aäãά@âàáạåæā∀Λ]|aa)"),
+    ("c", "[cςč℃Ↄ]"),
     # É can't lower correctly with sql lower function
-    {"input": "é", "replace": "[éÉ]"},
-    {"input": "e", "replace": "[eəéÉêёëèæē]"},
-    {"input": "'", "replace": "['’ˈ]"},
-    {"input": "n", "replace": "[nñ]"},
-    {"input": "0", "replace": "[0Ө]"},
-    {"input": "2", "replace": "[2²]"},
-    {"input": "3", "replace": "[3³]"},
-    {"input": "5", "replace": "[5⁵]"},
-    {"input": "*", "replace": "[*✻＊✳︎]"},
+    ("é", "[éÉ]"),
+    ("e", "[eəéÉêёëèæē]"),
+    ("'", "['’ˈ]"),
+    ("n", "[nñ]"),
+    ("0", "[0Ө]"),
+    ("2", "[2²]"),
+    ("3", "[3³]"),
+    ("5", "[5⁵]"),
+    ("*", "[*✻＊✳︎]"),
+    (" ", "( ?[²³⁵★☆♥♡\\/\\*✻✳︎＊'ˈ-∽~〜・·\\.,;:!?@_-⇔→≒=\\+†×±◎Ө♪♩♣␣∞] ?| )"),
+    ("i", "([iíίɪ]|ii)"),
+    ("x", "[x×]"),
+    ("b", "[bßβ]"),
+    ("r", "[rЯ]"),
+    ("s", "[sς]"),
+)
+
+# Fuse the rules into a single alternation pattern built once at import time :
+# one pass over the input instead of one full rewrite per rule.
+# Sorting the inputs longest first makes the alternation prefer the multi
+# character rules ("ou", "ae", ...) over their single character counterparts,
+# preserving the precedence the sequential rule order used to provide.
+_RULES_MAP = dict(ANIME_REGEX_REPLACE_RULES)
+
+# the longest-first precedence is a data property computed here once,
+# not an ordering the rule table has to maintain by hand
+_SORTED_RULE_INPUTS = sorted(_RULES_MAP, key=len, reverse=True)
+
+_RULES_RE = re.compile(
+    "|".join(re.escape(rule_input) for rule_input in _SORTED_RULE_INPUTS),
+    re.IGNORECASE,
+)
+
+# When no multi character rule ("ou", "ae", ...) fires on the input, every
+# remaining rule maps a single character, which str.translate applies in one
+# C level pass ; translate never re-scans its replacements, so mapping
+# directly to the replacement strings is safe
+_MULTI_CHAR_RULES_RE = re.compile(
+    "|".join(
+        re.escape(rule_input)
+        for rule_input in _SORTED_RULE_INPUTS
+        if len(rule_input) > 1
+    ),
+    re.IGNORECASE,
+)
+_SINGLE_CHAR_TRANS = str.maketrans(
     {
-        "input": " ",
-        "replace": "( ?[²³⁵★☆♥♡\\/\\*✻✳︎＊'ˈ-∽~〜・·\\.,;:!?@_-⇔→≒=\\+†×±◎Ө♪♩♣␣∞] ?| )",
-    },
-    {"input": "i", "replace": "([iíίɪ]|ii)"},
-    {"input": "x", "replace": "[x×]"},
-    {"input": "b", "replace": "[bßβ]"},
-    {"input": "r", "replace": "[rЯ]"},
-    {"input": "s", "replace": "[sς]"},
-]
+        case_variant: replace
+        for rule_input, replace in ANIME_REGEX_REPLACE_RULES
+        if len(rule_input) == 1
+        # translate has no case insensitive mode, map both cases explicitly
+        for case_variant in {rule_input, rule_input.upper()}
+    }
+)
 
 
+@cache
 def load_environment() -> dict:
     """Load environment variables from .env files and the environment.
     Load in that order :
@@ -68,6 +106,7 @@ def load_environment() -> dict:
     - environment variables
 
     The latest loaded variables override the previous ones.
+    Cached after the first call : the .env files are only read once.
 
     Returns
     -------
@@ -83,6 +122,10 @@ def load_environment() -> dict:
     return config
 
 
+# spaces and asterisks must stay unescaped so the replacement rules can match them
+_UNESCAPE_RE = re.compile(r"\\([ *])")
+
+
 def escape_and_replace(input_str: str) -> str:
     """Escape special characters and replace specific sequences.
 
@@ -97,14 +140,11 @@ def escape_and_replace(input_str: str) -> str:
         Escaped and replaced string.
     """
 
-    escaped_str = re.escape(input_str)
-    escaped_str = escaped_str.replace(r"\ ", " ")
-    escaped_str = escaped_str.replace(r"\*", "*")
-    return escaped_str
+    return _UNESCAPE_RE.sub(r"\1", re.escape(input_str))
 
 
 def apply_regex_rules(input_str: str) -> str:
-    """Apply replacement rules using compiled regular expressions.
+    """Apply replacement rules in a single pass over the input.
 
     Parameters
     ----------
@@ -117,13 +157,15 @@ def apply_regex_rules(input_str: str) -> str:
         String with replacement rules applied.
     """
 
-    output_str = input_str
-    for rule in ANIME_REGEX_REPLACE_RULES:
-        pattern = re.compile(re.escape(rule["input"]), re.IGNORECASE)
-        output_str = pattern.sub(rule["replace"], output_str)
-    return output_str
+    # Fast path : only single character rules can fire,
+    # apply them all in one translate pass
+    if _MULTI_CHAR_RULES_RE.search(input_str) is None:
+        return input_str.translate(_SINGLE_CHAR_TRANS)
+
+    return _RULES_RE.sub(lambda match: _RULES_MAP[match.group(0).lower()], input_str)
 
 
+@lru_cache(maxsize=4096)
 def generate_regex_pattern(input_str: str, partial_match: bool = True) -> str:
     """Generate a regex pattern for a string.
     Uses the rules defined in ANIME_REGEX_REPLACE_RULES.
@@ -142,18 +184,33 @@ def generate_regex_pattern(input_str: str, partial_match: bool = True) -> str:
         Regex pattern.
     """
 
-    # Escape and replace special characters
-    input_str = escape_and_replace(input_str.lower())
+    # nothing to expand for an empty input, skip the whole pipeline
+    # (the empty pattern only fullmatches the empty string)
+    if not input_str:
+        return ".*" if partial_match else ""
+
+    # no .lower() needed : the rules match case insensitively and already
+    # replace the characters that don't lowercase reliably
+    # Fast path : if no replacement rule fires on the input, the expansion
+    # would be a no-op, so the escaped input is already the final pattern
+    if _RULES_RE.search(input_str) is None:
+        ouput_str = escape_and_replace(input_str)
+    else:
+        # Escape and replace special characters
+        input_str = escape_and_replace(input_str)
 
-    # Apply replacement rules
-    ouput_str = apply_regex_rules(input_str)
+        # Apply replacement rules
+        ouput_str = apply_regex_rules(input_str)
 
     # Allow partial match or not
-    ouput_str = f".*{ouput_str}.*" if partial_match else f"^{ouput_str}$"
+    # no anchors needed for an exact match : the pattern is meant to be
+    # used with re.fullmatch, which anchors implicitly
+    ouput_str = f".*{ouput_str}.*" if partial_match else ouput_str
 
     return ouput_str
 
 
+@lru_cache(maxsize=4096)
 def process_user_input(
     input_str: str, partial_match: bool = True, swap_words: bool = True
 ) -> str:
@@ -178,21 +235,68 @@ def process_user_input(
         Regex pattern.
     """
 
-    # Generate the regex pattern
-    output_str = generate_regex_pattern(input_str, partial_match=partial_match)
+    words = input_str.split(" ")
+
+    # if swap_words is False, or there aren't exactly two distinct words,
+    # generate a single pattern ; swapping identical words would yield the same pattern
+    if not swap_words or len(words) != 2 or words[0] == words[1]:
+        return generate_regex_pattern(input_str, partial_match=partial_match)
+
+    # else generate each word's pattern once and assemble both orders from the
+    # parts, instead of running the full rule pipeline on both orderings
+    # the rules never span a space, so joining the word patterns with the
+    # space rule replacement yields the same pattern as the full input would
+    # non capturing groups : the groups are never back-referenced
+    word_pattern_1 = generate_regex_pattern(words[0], partial_match=False)
+    word_pattern_2 = generate_regex_pattern(words[1], partial_match=False)
+    separator = _RULES_MAP[" "]
+    output_str = (
+        f"(?:{word_pattern_1}{separator}{word_pattern_2})"
+        f"|(?:{word_pattern_2}{separator}{word_pattern_1})"
+    )
+
+    return f".*(?:{output_str}).*" if partial_match else output_str
 
-    # if swap_words is False, or there isn't exactly two words, return the pattern
-    if not swap_words or len(input_str.split(" ")) != 2:
-        return output_str
 
-    # else generate the pattern for the swapped user input, and return the pattern combined with the original pattern
-    swapped_input_str = " ".join(input_str.split(" ")[::-1])
-    swapped_output_str = generate_regex_pattern(
-        swapped_input_str, partial_match=partial_match
-    )
-    output_str = f"({output_str})|({swapped_output_str})"
+# every character appearing in a rule input : the generated pattern can match
+# those through their replacement alternatives, all the other characters can
+# only ever match themselves
+_RULE_CHARS = frozenset(
+    "".join(rule_input for rule_input, _ in ANIME_REGEX_REPLACE_RULES)
+)
 
-    return output_str
+
+@lru_cache(maxsize=256)
+def _answer_charset(answer: str) -> frozenset:
+    """Lowercased character set of a quiz answer, cached per answer."""
+    return frozenset(answer.lower())
+
+
+def can_possibly_match(user_input: str, quiz_answer: str) -> bool:
+    """Cheap necessary-condition check before running the answer regex.
+
+    Characters that no replacement rule rewrites can only match themselves
+    in the generated pattern ; if the guess contains such a character that
+    is absent from the quiz answer, the regex can't match and we can skip
+    it entirely.
+
+    Parameters
+    ----------
+    user_input : str
+        The user's guess.
+
+    quiz_answer : str
+        The correct answer for the quiz.
+
+    Returns
+    -------
+    bool
+        False if the guess can't possibly match, True if it might.
+    """
+
+    literal_chars = frozenset(user_input.lower()) - _RULE_CHARS
+
+    return literal_chars <= _answer_charset(quiz_answer)
 
 
 def is_admin(session: Session, user: User):
@@ -212,27 +316,39 @@ def is_admin(session: Session, user: User):
         Whether the user is an admin or not.
     """
 
-    admins = session.query(User).filter(User.is_admin == True).all()
+    # scalar existence query : no need to hydrate every admin row
+    return (
+        session.query(User.id)
+        .filter(User.id == user.id, User.is_admin.is_(True))
+        .first()
+        is not None
+    )
 
-    if user.id in [admin.id for admin in admins]:
-        return True
-    else:
-        return False
 
+_MEDALS = (":first_place:", ":second_place:", ":third_place:")
 
-def generate_stats_embed_content(session: Session, embed: Embed, answers: list[Answer]):
-    """Generate the stats embed content.
+
+def generate_stats_embed_content(
+    embed: Embed, nb_attempts: int, nb_unique_quizzes: int, nb_correct_answers: int
+):
+    """Generate the stats embed content from pre-aggregated counts.
+
+    The counts come straight from an aggregate query : there's no need to
+    ship the user's whole answer history to Python just to count it.
 
     Parameters
     ----------
-    session : Session
-        Database session.
-
     embed : Embed
         Embed to fill.
 
-    answers : list[Answer]
-        List of answers to process.
+    nb_attempts : int
+        Total number of answers the user submitted.
+
+    nb_unique_quizzes : int
+        Number of distinct quizzes the user answered.
+
+    nb_correct_answers : int
+        Number of correct answers.
 
     Returns
     -------
@@ -240,10 +356,7 @@ def generate_stats_embed_content(session: Session, embed: Embed, answers: list[A
         Filled embed.
     """
 
-    nb_unique_quizzes = len(set([answer.quiz_id for answer in answers]))
-
     # Guess Rates
-    nb_correct_answers = len([answer for answer in answers if answer.is_correct])
     guess_rate = (
         round(nb_correct_answers / nb_unique_quizzes * 100, 2)
         if nb_unique_quizzes
@@ -265,14 +378,13 @@ def generate_stats_embed_content(session: Session, embed: Embed, answers: list[A
     # Total attempts
     embed.add_field(
         name="> :1234: Total Attempts",
-        value=f"> {len(answers)} attempt(s)",
+        value=f"> {nb_attempts} attempt(s)",
         inline=True,
     )
 
     # Average number of attempts per quiz
-    unique_quizzes = set([answer.quiz_id for answer in answers])
     average_attempts = (
-        round(len(answers) / len(unique_quizzes), 2) if unique_quizzes else "N/A"
+        round(nb_attempts / nb_unique_quizzes, 2) if nb_unique_quizzes else "N/A"
     )
     embed.add_field(
         name="> :repeat: Average Attempts",
@@ -306,13 +418,9 @@ def generate_stats_embed_content(session: Session, embed: Embed, answers: list[A
         },
     ]
 
-    medals = [":first_place:", ":second_place:", ":third_place:"]
-
     fastest_guesses = "\n\n".join(
-        [
-            f"{medals[i]} | **{guess['guess_time']}s** : {guess['answer']} in {guess['attempts']} attempts on {guess['date']}"
-            for i, guess in enumerate(fastest_guesses)
-        ]
+        f"{_MEDALS[i]} | **{guess['guess_time']}s** : {guess['answer']} in {guess['attempts']} attempts on {guess['date']}"
+        for i, guess in enumerate(fastest_guesses)
     )
 
     embed.add_field(
@@ -324,6 +432,11 @@ def generate_stats_embed_content(session: Session, embed: Embed, answers: list[A
     return embed
 
 
+# cache the computed quiz date per wallclock minute :
+# nearly every command asks for it, but it changes at most once a day
+_QUIZ_DATE_CACHE: tuple[tuple, date] | None = None
+
+
 def get_current_quiz_date(daily_quiz_reset_time: time) -> date:
     """Get the current quiz date.
     The current quiz date is yesterday if it's before the daily quiz reset time,
@@ -340,16 +453,32 @@ def get_current_quiz_date(daily_quiz_reset_time: time) -> date:
         Current quiz date.
     """
 
+    global _QUIZ_DATE_CACHE
+
     # get time now
     now = datetime.now()
 
+    # reuse the cached date within the same minute, except during the reset
+    # minute itself where the boundary can be crossed mid-minute
+    cache_key = (now.toordinal(), now.hour, now.minute, daily_quiz_reset_time)
+    if (
+        _QUIZ_DATE_CACHE
+        and _QUIZ_DATE_CACHE[0] == cache_key
+        and (now.hour, now.minute)
+        != (daily_quiz_reset_time.hour, daily_quiz_reset_time.minute)
+    ):
+        return _QUIZ_DATE_CACHE[1]
+
     # today's quiz is yesterday date if it's before the daily quiz reset time
     # else it's today's date
-    return (
+    current_quiz_date = (
         now.date()
         if now.time() >= daily_quiz_reset_time
         else now.date() - timedelta(days=1)
     )
+    _QUIZ_DATE_CACHE = (cache_key, current_quiz_date)
+
+    return current_quiz_date
 
 
 def get_user_from_id(
@@ -380,7 +509,8 @@ def get_user_from_id(
         User from the database.
     """
 
-    user = session.query(User).filter(User.id == user_id).first()
+    # primary key lookup : hits the session identity map before issuing SQL
+    user = session.get(User, user_id)
 
     if not user and add_if_not_exist:
         if not user_name:
@@ -393,8 +523,41 @@ def get_user_from_id(
     return user
 
 
+# process level cache for the quiz types
+# they are static configuration, no need to query them on every interaction
+_QUIZ_TYPES_CACHE: list[QuizType] | None = None
+
+
+def get_quiz_types(session: Session) -> list[QuizType]:
+    """Get the quiz types, cached for the lifetime of the process.
+
+    Parameters
+    ----------
+    session : Session
+        Database session. Only used to fill the cache on the first call.
+
+    Returns
+    -------
+    list[QuizType]
+        List of quiz types.
+    """
+
+    global _QUIZ_TYPES_CACHE
+
+    if _QUIZ_TYPES_CACHE is None:
+        _QUIZ_TYPES_CACHE = session.query(QuizType).all()
+
+    return _QUIZ_TYPES_CACHE
+
+
+# cache the quiz type choices for a minute :
+# they rarely change but are requested repeatedly
+_QUIZ_TYPE_CHOICES_CACHE: tuple[float, list] | None = None
+_QUIZ_TYPE_CHOICES_TTL = 60.0
+
+
 def get_quiz_type_choices(session: Session) -> list[tuple[int, str]]:
-    """Get the quiz type choices.
+    """Get the quiz type choices, cached for a short while.
 
     Parameters
     ----------
@@ -407,9 +570,20 @@ def get_quiz_type_choices(session: Session) -> list[tuple[int, str]]:
         List of quiz type choices.
     """
 
+    global _QUIZ_TYPE_CHOICES_CACHE
+
+    if (
+        _QUIZ_TYPE_CHOICES_CACHE
+        and monotonic() - _QUIZ_TYPE_CHOICES_CACHE[0] < _QUIZ_TYPE_CHOICES_TTL
+    ):
+        return _QUIZ_TYPE_CHOICES_CACHE[1]
+
     quiz_types = session.query(QuizType).distinct().all()
 
-    return [
+    choices = [
         app_commands.Choice(value=quiz_type.id, name=quiz_type.type)
         for quiz_type in quiz_types
     ]
+    _QUIZ_TYPE_CHOICES_CACHE = (monotonic(), choices)
+
+    return choices